@@ -3,8 +3,13 @@ import requests
 from msal import ConfidentialClientApplication
 import pandas as pd
 import io
-from datetime import datetime
+from datetime import datetime, timezone
 import sqlite3
+import tempfile
+import hashlib
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
 import openpyxl
 from reportlab.lib.pagesizes import A4
 from reportlab.lib import colors
@@ -69,6 +74,33 @@ except FileNotFoundError:
     st.stop()
 
 
+# Versão do layout do PDF: incrementar ao alterar gerar_pdf_avaliacao
+# para que os PDFs já arquivados sejam gerados novamente
+PDF_TEMPLATE_VERSAO = 1
+
+# Pasta do arquivo de PDFs (um subdiretório por id de avaliação)
+PDF_ARQUIVO_DIR = 'pdfs'
+
+# Threads que geram PDFs em segundo plano, compartilhadas por todas as sessões
+PDF_WORKERS = 4
+
+# Idade (segundos) a partir da qual um .tmp no arquivo é considerado abandonado
+PDF_TMP_IDADE_MAXIMA = 3600
+
+
+# Data da avaliação no horário local (o banco grava CURRENT_TIMESTAMP em UTC)
+def data_da_avaliacao(dados_avaliacao):
+    if dados_avaliacao.get('data_avaliacao'):
+        data = datetime.fromisoformat(str(dados_avaliacao['data_avaliacao']))
+        return data.replace(tzinfo=timezone.utc).astimezone()
+    return datetime.now()
+
+
+def nome_arquivo_pdf(dados_avaliacao):
+    timestamp = data_da_avaliacao(dados_avaliacao).strftime('%Y%m%d_%H%M%S')
+    return f"Avaliacao_{dados_avaliacao['colaborador'].replace(' ', '_')}_{timestamp}.pdf"
+
+
 # Função para gerar PDF da avaliação
 def gerar_pdf_avaliacao(dados_avaliacao, nome_arquivo=None):
     """
@@ -76,8 +108,7 @@ def gerar_pdf_avaliacao(dados_avaliacao, nome_arquivo=None):
     dados_avaliacao: dicionário com os dados da avaliação
     """
     if nome_arquivo is None:
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        nome_arquivo = f"Avaliacao_{dados_avaliacao['colaborador'].replace(' ', '_')}_{timestamp}.pdf"
+        nome_arquivo = nome_arquivo_pdf(dados_avaliacao)
 
     # Criar buffer para o PDF
     buffer = io.BytesIO()
@@ -138,14 +169,16 @@ def gerar_pdf_avaliacao(dados_avaliacao, nome_arquivo=None):
             elements.append(logo)
             elements.append(Spacer(1, 0.5 * cm))
         except Exception as e:
-            st.warning(f"Não foi possível adicionar a logo: {e}")
+            # Roda na fila de PDFs, sem sessão para exibir avisos; falhar evita
+            # arquivar um PDF sem a logo
+            raise RuntimeError(f"Não foi possível adicionar a logo: {e}") from e
 
     # Título
     elements.append(Paragraph("FICHA DE AVALIAÇÃO DE EXPERIÊNCIA", titulo_style))
     elements.append(Spacer(1, 0.5 * cm))
 
     # Informações básicas
-    data_atual = datetime.now().strftime('%d/%m/%Y')
+    data_atual = data_da_avaliacao(dados_avaliacao).strftime('%d/%m/%Y')
 
     info_basica = [
         ['Data da Avaliação:', data_atual],
@@ -275,9 +308,50 @@ def init_db():
         c.execute("ALTER TABLE avaliacoes ADD COLUMN cargo_avaliador TEXT")
         conn.commit()
 
+    # Índices para as consultas particionadas por regional e por colaborador
+    c.execute("CREATE INDEX IF NOT EXISTS idx_avaliacoes_regional ON avaliacoes (regional, data_avaliacao)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_avaliacoes_colaborador ON avaliacoes (colaborador, tipo_avaliacao)")
+
+    # Migração única: preencher a regional das avaliações gravadas antes do particionamento
+    c.execute("PRAGMA user_version")
+    if c.fetchone()[0] < 1:
+        migrar_regional_avaliacoes(conn)
+
     conn.close()
 
 
+# Associar as avaliações sem regional à regional do colaborador na base;
+# as que não encontram o colaborador, ou cujo nome aparece em mais de uma
+# regional, ficam na partição SEM_REGIONAL
+def migrar_regional_avaliacoes(conn):
+    c = conn.cursor()
+    c.execute("SELECT COUNT(*) FROM avaliacoes WHERE regional IS NULL OR regional = ''")
+    if c.fetchone()[0] > 0:
+        df = download_excel_sharepoint()
+        if df is None or df.attrs.get('coluna_ausente'):
+            # Sem a base (ou sem a coluna de regional) não há como associar;
+            # tentar novamente na próxima execução
+            return
+
+        c.execute("CREATE TEMP TABLE base_regional (colaborador TEXT, regional TEXT, PRIMARY KEY (colaborador, regional))")
+        c.executemany(
+            "INSERT OR IGNORE INTO base_regional (colaborador, regional) VALUES (?, ?)",
+            zip(df['nome'].astype(str), regionais_da_base(df))
+        )
+        c.execute('''
+            UPDATE avaliacoes SET regional = COALESCE(
+                (SELECT MIN(regional) FROM base_regional WHERE base_regional.colaborador = avaliacoes.colaborador
+                 HAVING COUNT(DISTINCT regional) = 1),
+                ?
+            )
+            WHERE regional IS NULL OR regional = ''
+        ''', (SEM_REGIONAL,))
+        c.execute("DROP TABLE base_regional")
+
+    c.execute("PRAGMA user_version = 1")
+    conn.commit()
+
+
 # Salvar avaliação no banco
 def salvar_avaliacao(dados):
     conn = sqlite3.connect('avaliacoes.db')
@@ -290,17 +364,42 @@ def salvar_avaliacao(dados):
         ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
     ''', dados)
     conn.commit()
+    avaliacao_id = c.lastrowid
     conn.close()
+    return avaliacao_id
 
 
-# Buscar avaliações do banco
-def buscar_avaliacoes():
+# Buscar avaliações de uma regional
+def buscar_avaliacoes(regional):
     conn = sqlite3.connect('avaliacoes.db')
-    df = pd.read_sql_query("SELECT * FROM avaliacoes ORDER BY data_avaliacao DESC", conn)
+    df = pd.read_sql_query(
+        "SELECT * FROM avaliacoes WHERE regional = ? ORDER BY data_avaliacao DESC",
+        conn, params=(regional,)
+    )
     conn.close()
     return df
 
 
+# Contar avaliações de uma regional
+def contar_avaliacoes(regional):
+    conn = sqlite3.connect('avaliacoes.db')
+    c = conn.cursor()
+    c.execute("SELECT COUNT(*) FROM avaliacoes WHERE regional = ?", (regional,))
+    count = c.fetchone()[0]
+    conn.close()
+    return count
+
+
+# Regionais que já possuem avaliações gravadas
+def listar_regionais_avaliacoes():
+    conn = sqlite3.connect('avaliacoes.db')
+    c = conn.cursor()
+    c.execute("SELECT DISTINCT regional FROM avaliacoes WHERE regional IS NOT NULL AND regional != ''")
+    regionais = [linha[0] for linha in c.fetchall()]
+    conn.close()
+    return regionais
+
+
 # Verificar se colaborador já foi avaliado
 def ja_foi_avaliado(colaborador, tipo_avaliacao):
     conn = sqlite3.connect('avaliacoes.db')
@@ -314,6 +413,159 @@ def ja_foi_avaliado(colaborador, tipo_avaliacao):
     return count > 0
 
 
+# Buscar uma avaliação pelo id
+def buscar_avaliacao(avaliacao_id):
+    conn = sqlite3.connect('avaliacoes.db')
+    df = pd.read_sql_query("SELECT * FROM avaliacoes WHERE id = ?", conn, params=(int(avaliacao_id),))
+    conn.close()
+    if df.empty:
+        return None
+    return df.iloc[0]
+
+
+# Montar os dados do PDF a partir de uma linha da tabela avaliacoes
+def dados_pdf_avaliacao(row):
+    return {
+        'avaliador': row['avaliador'],
+        'cargo_avaliador': row.get('cargo_avaliador', '') or '',
+        'colaborador': row['colaborador'],
+        'cargo': row['cargo'],
+        'tipo_avaliacao': row['tipo_avaliacao'],
+        'adaptacao': row['adaptacao'],
+        'interesse': row['interesse'],
+        'relacionamento': row['relacionamento'],
+        'capacidade': row['capacidade'],
+        'classificacao': row['classificacao'],
+        'definicao': row['definicao'],
+        'data_avaliacao': row['data_avaliacao'],
+    }
+
+
+# Caminho do PDF arquivado: o nome é o hash do conteúdo da avaliação, da
+# versão do layout e da logo, então qualquer alteração gera um novo arquivo
+def caminho_pdf_arquivado(avaliacao_id, dados_pdf):
+    logo = os.path.getmtime(LOGO_PATH) if os.path.exists(LOGO_PATH) else None
+    conteudo = json.dumps(
+        {'versao': PDF_TEMPLATE_VERSAO, 'logo': logo, 'id': int(avaliacao_id), **dados_pdf},
+        sort_keys=True, default=str
+    )
+    chave = hashlib.sha256(conteudo.encode('utf-8')).hexdigest()
+    return os.path.join(PDF_ARQUIVO_DIR, str(int(avaliacao_id)), f"{chave}.pdf")
+
+
+# Ler um PDF arquivado; None se ainda não foi gerado ou se foi substituído
+# por uma versão mais nova enquanto era lido
+def ler_pdf_arquivado(caminho):
+    try:
+        with open(caminho, 'rb') as arquivo:
+            return arquivo.read()
+    except FileNotFoundError:
+        return None
+
+
+# Gerar (se necessário) e arquivar o PDF de uma avaliação já gravada no banco
+def arquivar_pdf_avaliacao(avaliacao_id):
+    row = buscar_avaliacao(avaliacao_id)
+    if row is None:
+        raise ValueError(f"Avaliação {avaliacao_id} não encontrada")
+
+    dados_pdf = dados_pdf_avaliacao(row)
+    caminho = caminho_pdf_arquivado(avaliacao_id, dados_pdf)
+
+    pdf_bytes = ler_pdf_arquivado(caminho)
+    if pdf_bytes is None:
+        pasta = os.path.dirname(caminho)
+        os.makedirs(pasta, exist_ok=True)
+
+        pdf_buffer, _ = gerar_pdf_avaliacao(dados_pdf)
+        pdf_bytes = pdf_buffer.getvalue()
+        with tempfile.NamedTemporaryFile(dir=pasta, suffix='.tmp', delete=False) as temporario:
+            temporario.write(pdf_bytes)
+        os.replace(temporario.name, caminho)
+
+        # Remover versões antigas e temporários abandonados; a versão atual é
+        # calculada de novo porque a linha pode ter mudado durante a geração
+        atual = buscar_avaliacao(avaliacao_id)
+        caminho_atual = caminho_pdf_arquivado(avaliacao_id, dados_pdf_avaliacao(atual)) if atual is not None else None
+        for nome in os.listdir(pasta):
+            antigo = os.path.join(pasta, nome)
+            try:
+                if nome.endswith('.pdf') and antigo != caminho_atual:
+                    os.remove(antigo)
+                elif nome.endswith('.tmp') and time.time() - os.path.getmtime(antigo) > PDF_TMP_IDADE_MAXIMA:
+                    os.remove(antigo)
+            except FileNotFoundError:
+                pass
+
+    return pdf_bytes, nome_arquivo_pdf(dados_pdf)
+
+
+# Fila de geração de PDFs em segundo plano (compartilhada entre as sessões)
+@st.cache_resource
+def fila_pdf():
+    return ThreadPoolExecutor(max_workers=PDF_WORKERS, thread_name_prefix="pdf")
+
+
+def agendar_pdf_avaliacao(avaliacao_id):
+    return fila_pdf().submit(arquivar_pdf_avaliacao, avaliacao_id)
+
+
+# Obter o PDF de uma avaliação, servindo do arquivo quando já estiver gerado
+def obter_pdf_avaliacao(avaliacao_id):
+    row = buscar_avaliacao(avaliacao_id)
+    if row is None:
+        raise ValueError(f"Avaliação {avaliacao_id} não encontrada")
+
+    dados_pdf = dados_pdf_avaliacao(row)
+    pdf_bytes = ler_pdf_arquivado(caminho_pdf_arquivado(avaliacao_id, dados_pdf))
+    if pdf_bytes is not None:
+        return pdf_bytes, nome_arquivo_pdf(dados_pdf)
+
+    return agendar_pdf_avaliacao(avaliacao_id).result()
+
+
+# Colunas da base de colaboradores usadas pelo sistema (posição na planilha)
+COLUNAS_BASE = {
+    'nome': 0,
+    'cargo': 8,
+    'data_admissao': 9,
+}
+
+# Cabeçalho da coluna de regional (localizada pelo nome, não pela posição)
+CABECALHO_REGIONAL = 'REGIONAL'
+
+
+# Ler a base de colaboradores linha a linha, mantendo apenas as colunas usadas
+def ler_base_colaboradores(arquivo):
+    wb = openpyxl.load_workbook(arquivo, read_only=True, data_only=True)
+    try:
+        ws = wb.worksheets[0]
+
+        cabecalho = next(ws.iter_rows(max_row=1, values_only=True), ())
+        cabecalho = [str(valor).strip().upper() if valor is not None else '' for valor in cabecalho]
+        colunas = dict(COLUNAS_BASE)
+        if CABECALHO_REGIONAL in cabecalho:
+            colunas['regional'] = cabecalho.index(CABECALHO_REGIONAL)
+
+        ultima_coluna = max(colunas.values()) + 1
+        linhas = []
+        for linha in ws.iter_rows(min_row=2, max_col=ultima_coluna, values_only=True):
+            valores = [linha[i] if i < len(linha) else None for i in colunas.values()]
+            if any(valor is not None for valor in valores):
+                linhas.append(valores)
+    finally:
+        wb.close()
+
+    df = pd.DataFrame(linhas, columns=list(colunas))
+
+    # Sem a coluna de regional todos os colaboradores ficam em SEM_REGIONAL
+    if 'regional' not in colunas:
+        df['regional'] = None
+        df.attrs['coluna_ausente'] = CABECALHO_REGIONAL
+
+    return df
+
+
 # Baixar dados do SharePoint
 @st.cache_data(ttl=3600)
 def download_excel_sharepoint():
@@ -346,22 +598,66 @@ def download_excel_sharepoint():
                     for item in files_found:
                         if 'Base de Colaboradores - Rezende Energia' in item['name']:
                             download_url = f"https://graph.microsoft.com/v1.0/sites/{site_id}/drive/items/{item['id']}/content"
-                            download_response = requests.get(download_url, headers=headers)
-
-                            if download_response.status_code == 200:
-                                df = pd.read_excel(io.BytesIO(download_response.content))
-                                return df
+                            # Gravar em disco aos poucos para não manter a planilha inteira em memória
+                            with tempfile.TemporaryFile() as arquivo:
+                                with requests.get(download_url, headers=headers, stream=True) as download_response:
+                                    if download_response.status_code != 200:
+                                        continue
+                                    for bloco in download_response.iter_content(chunk_size=1024 * 1024):
+                                        arquivo.write(bloco)
+
+                                arquivo.seek(0)
+                                return ler_base_colaboradores(arquivo)
         return None
     except Exception as e:
         st.error(f"Erro ao baixar dados: {e}")
         return None
 
 
+# Colaboradores sem regional na base ficam agrupados nesta partição
+SEM_REGIONAL = "SEM REGIONAL"
+
+
+def regionais_da_base(df):
+    return df['regional'].fillna('').astype(str).str.strip().replace('', SEM_REGIONAL)
+
+
+# Regionais presentes na base de colaboradores
+@st.cache_data(ttl=3600)
+def listar_regionais():
+    df = download_excel_sharepoint()
+    if df is None:
+        return None
+    return sorted(regionais_da_base(df).unique().tolist())
+
+
+# Nome da coluna de regional quando ela não existe na base (None se existir)
+@st.cache_data(ttl=3600)
+def coluna_regional_ausente():
+    df = download_excel_sharepoint()
+    if df is None:
+        return None
+    return df.attrs.get('coluna_ausente')
+
+
+# Base de colaboradores de uma única regional; cada sessão carrega
+# apenas a partição da sua regional
+@st.cache_data(ttl=3600)
+def base_colaboradores_regional(regional):
+    df = download_excel_sharepoint()
+    if df is None:
+        return None
+
+    base = df[regionais_da_base(df) == regional].reset_index(drop=True)
+    base['regional'] = regional
+    return base
+
+
 # Identificar avaliadores
 def identificar_avaliadores(df):
     cargos_avaliadores = ['SUPERVISOR', 'LIDER DE FROTA', 'GERENTE OPERACIONAL', 'COORDENADOR OPERACIONAL']
-    avaliadores = df[df.iloc[:, 8].str.upper().isin(cargos_avaliadores)]
-    return sorted(avaliadores.iloc[:, 0].tolist())
+    avaliadores = df[df['cargo'].str.upper().isin(cargos_avaliadores)]
+    return sorted(avaliadores['nome'].tolist())
 
 
 # Identificar colaboradores para avaliação
@@ -372,8 +668,8 @@ def identificar_colaboradores_para_avaliacao(df):
 
     for idx, row in df.iterrows():
         try:
-            nome = row.iloc[0]
-            data_admissao = pd.to_datetime(row.iloc[9])
+            nome = row['nome']
+            data_admissao = pd.to_datetime(row['data_admissao'])
             dias_desde_admissao = (hoje - data_admissao).days
 
             if 37 <= dias_desde_admissao <= 43:
@@ -410,12 +706,31 @@ menu = st.sidebar.selectbox(
 
 # Carregar dados
 with st.spinner("Carregando dados do SharePoint..."):
-    df = download_excel_sharepoint()
+    regionais = listar_regionais()
 
-if df is None:
+if regionais is None:
     st.error("❌ Erro ao carregar dados do SharePoint. Verifique as credenciais.")
     st.stop()
 
+# Incluir regionais que só existem no histórico (ex.: SEM_REGIONAL da migração)
+regionais = sorted(set(regionais) | set(listar_regionais_avaliacoes()))
+
+if not regionais:
+    st.warning("Nenhum colaborador encontrado na base do SharePoint.")
+    st.stop()
+
+regional = st.sidebar.selectbox("Regional", regionais, key="regional")
+
+coluna_ausente = coluna_regional_ausente()
+if coluna_ausente:
+    st.sidebar.warning(
+        f"⚠️ Coluna '{coluna_ausente}' não encontrada na base de colaboradores. "
+        f"Todos os colaboradores foram agrupados em {SEM_REGIONAL}."
+    )
+
+with st.spinner(f"Carregando colaboradores da regional {regional}..."):
+    df = base_colaboradores_regional(regional)
+
 # DASHBOARD
 if menu == "Dashboard":
     st.header("📊 Dashboard de Avaliações")
@@ -436,7 +751,7 @@ if menu == "Dashboard":
         st.metric("📋 Avaliações 80 dias", len(colab_80))
 
     with col4:
-        total_avaliacoes = len(buscar_avaliacoes())
+        total_avaliacoes = contar_avaliacoes(regional)
         st.metric("✅ Avaliações Realizadas", total_avaliacoes)
 
     st.markdown("---")
@@ -471,7 +786,7 @@ elif menu == "Nova Avaliação":
     st.header("📝 Nova Avaliação de Experiência")
 
     avaliadores = identificar_avaliadores(df)
-    todos_colaboradores = sorted(df.iloc[:, 0].dropna().tolist())
+    todos_colaboradores = sorted(df['nome'].dropna().tolist())
 
     st.subheader("Informações Básicas")
 
@@ -482,19 +797,21 @@ elif menu == "Nova Avaliação":
         # Buscar cargo do avaliador
         cargo_avaliador = ""
         if avaliador:
-            linha_avaliador = df[df.iloc[:, 0] == avaliador]
+            linha_avaliador = df[df['nome'] == avaliador]
             if not linha_avaliador.empty:
-                cargo_avaliador = str(linha_avaliador.iloc[0, 8]) if pd.notna(linha_avaliador.iloc[0, 8]) else ""
+                cargo_avaliador = str(linha_avaliador['cargo'].iloc[0]) if pd.notna(linha_avaliador['cargo'].iloc[0]) else ""
         st.text_input("Cargo do Avaliador", value=cargo_avaliador, disabled=True, key="cargo_avaliador_display")
 
     with col2:
         colaborador = st.selectbox("Nome do colaborador *", todos_colaboradores)
         # Buscar cargo do colaborador selecionado automaticamente
         cargo_colaborador = ""
+        regional_colaborador = regional
         if colaborador:
-            linha_colaborador = df[df.iloc[:, 0] == colaborador]
+            linha_colaborador = df[df['nome'] == colaborador]
             if not linha_colaborador.empty:
-                cargo_colaborador = str(linha_colaborador.iloc[0, 8]) if pd.notna(linha_colaborador.iloc[0, 8]) else ""
+                cargo_colaborador = str(linha_colaborador['cargo'].iloc[0]) if pd.notna(linha_colaborador['cargo'].iloc[0]) else ""
+                regional_colaborador = linha_colaborador['regional'].iloc[0]
         st.text_input("Cargo do Colaborador *", value=cargo_colaborador, disabled=True, key="cargo_colaborador_display")
 
     tipo_avaliacao = st.radio("Avaliação de:", ["40 dias", "80 dias"])
@@ -592,51 +909,45 @@ elif menu == "Nova Avaliação":
         else:
             # Salvar no banco
             dados = (
-                avaliador, colaborador, cargo, cargo_avaliador, "", tipo_avaliacao,
+                avaliador, colaborador, cargo, cargo_avaliador, regional_colaborador, tipo_avaliacao,
                 adaptacao, interesse, relacionamento, capacidade,
                 classificacao, definicao
             )
-            salvar_avaliacao(dados)
-
-            # Gerar PDF
-            dados_pdf = {
-                'avaliador': avaliador,
-                'cargo_avaliador': cargo_avaliador,
-                'colaborador': colaborador,
-                'cargo': cargo,
-                'tipo_avaliacao': tipo_avaliacao,
-                'adaptacao': adaptacao,
-                'interesse': interesse,
-                'relacionamento': relacionamento,
-                'capacidade': capacidade,
-                'classificacao': classificacao,
-                'definicao': definicao
-            }
-
-            try:
-                pdf_buffer, pdf_nome = gerar_pdf_avaliacao(dados_pdf)
-
-                st.success(f"✅ Avaliação de {colaborador} salva com sucesso!")
-                st.balloons()
-
-                # Botão de download do PDF
-                st.download_button(
-                    label="📄 Download PDF da Avaliação",
-                    data=pdf_buffer,
-                    file_name=pdf_nome,
-                    mime="application/pdf",
-                    use_container_width=True
-                )
+            avaliacao_id = salvar_avaliacao(dados)
+
+            # O PDF é gerado em segundo plano e arquivado pelo id da avaliação;
+            # o download é oferecido quando estiver pronto
+            st.session_state['pdf_pendente'] = agendar_pdf_avaliacao(avaliacao_id)
+
+            st.success(f"✅ Avaliação de {colaborador} salva com sucesso!")
+            st.balloons()
+
+    # PDF da última avaliação salva nesta sessão
+    pdf_pendente = st.session_state.get('pdf_pendente')
+    if pdf_pendente is not None:
+        if not pdf_pendente.done():
+            st.info("⏳ O PDF da avaliação está sendo gerado. Ele também ficará disponível no Histórico.")
+            st.button("🔄 Atualizar", key="atualizar_pdf")
+        elif pdf_pendente.exception() is not None:
+            st.error(f"❌ Erro ao gerar PDF: {pdf_pendente.exception()}")
+            st.info("A avaliação foi salva, mas o PDF não pôde ser gerado.")
+        else:
+            pdf_bytes, pdf_nome = pdf_pendente.result()
 
-            except Exception as e:
-                st.error(f"❌ Erro ao gerar PDF: {e}")
-                st.info("A avaliação foi salva, mas o PDF não pôde ser gerado.")
+            # Botão de download do PDF
+            st.download_button(
+                label="📄 Download PDF da Avaliação",
+                data=pdf_bytes,
+                file_name=pdf_nome,
+                mime="application/pdf",
+                use_container_width=True
+            )
 
 # HISTÓRICO DE AVALIAÇÕES
 elif menu == "Histórico de Avaliações":
     st.header("📚 Histórico de Avaliações")
 
-    avaliacoes_df = buscar_avaliacoes()
+    avaliacoes_df = buscar_avaliacoes(regional)
 
     if len(avaliacoes_df) > 0:
         st.markdown(f"**Total de avaliações registradas:** {len(avaliacoes_df)}")
@@ -693,26 +1004,12 @@ elif menu == "Histórico de Avaliações":
 
                 # Botão para gerar PDF da avaliação histórica
                 if st.button(f"📄 Gerar PDF", key=f"pdf_{idx}"):
-                    dados_pdf = {
-                        'avaliador': row['avaliador'],
-                        'cargo_avaliador': row.get('cargo_avaliador', ''),
-                        'colaborador': row['colaborador'],
-                        'cargo': row['cargo'],
-                        'tipo_avaliacao': row['tipo_avaliacao'],
-                        'adaptacao': row['adaptacao'],
-                        'interesse': row['interesse'],
-                        'relacionamento': row['relacionamento'],
-                        'capacidade': row['capacidade'],
-                        'classificacao': row['classificacao'],
-                        'definicao': row['definicao']
-                    }
-
                     try:
-                        pdf_buffer, pdf_nome = gerar_pdf_avaliacao(dados_pdf)
+                        pdf_bytes, pdf_nome = obter_pdf_avaliacao(row['id'])
 
                         st.download_button(
                             label="⬇️ Download PDF",
-                            data=pdf_buffer,
+                            data=pdf_bytes,
                             file_name=pdf_nome,
                             mime="application/pdf",
                             key=f"download_pdf_{idx}"
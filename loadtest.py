@@ -0,0 +1,410 @@
+"""
+Teste de carga do Sistema de Avaliação - Rezende Energia
+
+Simula vários supervisores usando o dashboard ao mesmo tempo, sem acesso à
+internet: um servidor HTTP local faz o papel do Microsoft Graph / Azure AD
+(MSAL) e entrega uma planilha de colaboradores sintética. Cada sessão percorre
+Dashboard, Nova Avaliação (envio do formulário) e Histórico (exportação Excel)
+através do AppTest do Streamlit.
+
+Uso:
+    python loadtest.py --sessoes 20 --concorrencia 8 --colaboradores 2000
+"""
+import argparse
+import ast
+import io
+import json
+import multiprocessing
+import os
+import random
+import sqlite3
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import unquote, urlsplit
+
+import numpy as np
+import openpyxl
+import requests
+from requests.adapters import HTTPAdapter
+from streamlit.testing.v1 import AppTest
+
+DIRETORIO = os.path.dirname(os.path.abspath(__file__))
+DASHBOARD_PATH = os.path.join(DIRETORIO, "dashboard.py")
+LOGO_PATH = os.path.join(DIRETORIO, "logo.png")
+
+NOME_PLANILHA = "Base de Colaboradores - Rezende Energia"
+CARGOS_AVALIADORES = ['SUPERVISOR', 'LIDER DE FROTA', 'GERENTE OPERACIONAL', 'COORDENADOR OPERACIONAL']
+CARGOS_OPERACIONAIS = ['ELETRICISTA', 'AUXILIAR DE ELETRICISTA', 'MOTORISTA', 'OPERADOR DE MUNCK', 'ALMOXARIFE']
+REGIONAIS = ['BELÉM', 'MARABÁ', 'SANTARÉM', 'CASTANHAL']
+
+
+# Lê o mapa de colunas usado pelo dashboard.py (importá-lo executaria o app),
+# para que a planilha sintética e o leitor do app não divirjam
+def _colunas_do_dashboard():
+    with open(DASHBOARD_PATH, encoding="utf-8") as arquivo:
+        arvore = ast.parse(arquivo.read())
+
+    valores = {}
+    for no in arvore.body:
+        if isinstance(no, ast.Assign) and len(no.targets) == 1 and isinstance(no.targets[0], ast.Name):
+            if no.targets[0].id in ("COLUNAS_BASE", "CABECALHO_REGIONAL"):
+                valores[no.targets[0].id] = ast.literal_eval(no.value)
+    return valores["COLUNAS_BASE"], valores["CABECALHO_REGIONAL"]
+
+
+# Planilha sintética. O layout da base real do RH não é conhecido aqui: só as
+# colunas lidas pelo app são preenchidas, nas posições de COLUNAS_BASE, e a
+# regional fica numa coluna extra ao final, encontrada pelo cabeçalho.
+# As demais colunas são apenas preenchimento.
+def gerar_planilha_colaboradores(quantidade, semente=0):
+    rnd = random.Random(semente)
+    hoje = datetime.now()
+
+    colunas, cabecalho_regional = _colunas_do_dashboard()
+    posicao_regional = max(colunas.values()) + 1
+
+    cabecalho = [f"COLUNA {i + 1}" for i in range(posicao_regional + 1)]
+    cabecalho[colunas['nome']] = 'NOME'
+    cabecalho[colunas['cargo']] = 'CARGO'
+    cabecalho[colunas['data_admissao']] = 'DATA DE ADMISSÃO'
+    cabecalho[posicao_regional] = cabecalho_regional
+
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    ws.title = "Colaboradores"
+    ws.append(cabecalho)
+
+    for i in range(quantidade):
+        if i % 25 == 0:
+            cargo = rnd.choice(CARGOS_AVALIADORES)
+        else:
+            cargo = rnd.choice(CARGOS_OPERACIONAIS)
+
+        # Parte dos colaboradores cai nas janelas de 40 e 80 dias
+        sorteio = rnd.random()
+        if sorteio < 0.1:
+            dias = rnd.randint(37, 43)
+        elif sorteio < 0.2:
+            dias = rnd.randint(77, 83)
+        else:
+            dias = rnd.randint(0, 3000)
+
+        linha = [f"preenchimento {i}"] * len(cabecalho)
+        linha[colunas['nome']] = f"COLABORADOR {i:05d}"
+        linha[colunas['cargo']] = cargo
+        linha[colunas['data_admissao']] = hoje - timedelta(days=dias)
+        linha[posicao_regional] = REGIONAIS[i % len(REGIONAIS)]
+        ws.append(linha)
+
+    buffer = io.BytesIO()
+    wb.save(buffer)
+    return buffer.getvalue()
+
+
+# Servidor local que responde como login.microsoftonline.com e graph.microsoft.com.
+# O primeiro segmento do caminho é o host original (ver _AdaptadorLocal).
+class _GraphLocalHandler(BaseHTTPRequestHandler):
+    planilha = b""
+    contador = defaultdict(int)
+    lock = threading.Lock()
+
+    def log_message(self, format, *args):
+        pass
+
+    def _responder(self, status, corpo, content_type="application/json"):
+        if not isinstance(corpo, bytes):
+            corpo = json.dumps(corpo).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(corpo)))
+        self.end_headers()
+        self.wfile.write(corpo)
+
+    def _rota(self):
+        partes = urlsplit(self.path)
+        host, _, caminho = unquote(partes.path).lstrip("/").partition("/")
+        with self.lock:
+            self.contador[host] += 1
+        return host, "/" + caminho
+
+    def do_GET(self):
+        host, caminho = self._rota()
+
+        if host == "login.microsoftonline.com" and caminho.endswith("/.well-known/openid-configuration"):
+            tenant = caminho.split("/")[1]
+            base = f"https://login.microsoftonline.com/{tenant}"
+            return self._responder(200, {
+                "issuer": f"{base}/v2.0",
+                "authorization_endpoint": f"{base}/oauth2/v2.0/authorize",
+                "token_endpoint": f"{base}/oauth2/v2.0/token",
+            })
+
+        if host == "graph.microsoft.com":
+            if caminho.endswith(":/sites/Intranet"):
+                return self._responder(200, {"id": "site-local"})
+            if "/search(" in caminho:
+                return self._responder(200, {"value": [
+                    {"id": "item-local", "name": f"{NOME_PLANILHA}.xlsx"},
+                ]})
+            if caminho.endswith("/drive/items/item-local/content"):
+                return self._responder(
+                    200, self.planilha,
+                    "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+                )
+
+        self._responder(404, {"error": {"code": "itemNotFound", "message": caminho}})
+
+    def do_POST(self):
+        host, caminho = self._rota()
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+
+        if host == "login.microsoftonline.com" and caminho.endswith("/oauth2/v2.0/token"):
+            return self._responder(200, {
+                "token_type": "Bearer",
+                "expires_in": 3600,
+                "access_token": "token-local",
+            })
+
+        self._responder(404, {"error": "not_found"})
+
+
+# Redireciona todo o tráfego https do requests (usado também pelo MSAL)
+# para o servidor local, garantindo que nada saia da máquina
+class _AdaptadorLocal(HTTPAdapter):
+    def __init__(self, base_url):
+        super().__init__()
+        self.base_url = base_url
+
+    def send(self, request, **kwargs):
+        partes = urlsplit(request.url)
+        url = f"{self.base_url}/{partes.netloc}{partes.path}"
+        if partes.query:
+            url += f"?{partes.query}"
+        request.url = url
+        return super().send(request, **kwargs)
+
+
+def instalar_rede_local(base_url):
+    adaptador = _AdaptadorLocal(base_url)
+    get_adapter_original = requests.Session.get_adapter
+
+    # O MSAL monta o próprio adaptador https na sessão, por isso a troca é feita aqui
+    def get_adapter_local(self, url):
+        if url.lower().startswith("https://"):
+            return adaptador
+        return get_adapter_original(self, url)
+
+    requests.Session.get_adapter = get_adapter_local
+
+
+# Instrumentação do SQLite: mede o tempo das escritas (que incluem a espera
+# pelo lock do banco) e conta os erros "database is locked".
+# Cada processo de trabalho mantém as próprias métricas.
+metricas_sqlite = {"escritas": [], "bloqueios": 0}
+
+
+def _medir_escrita(operacao, *args):
+    inicio = time.perf_counter()
+    try:
+        return operacao(*args)
+    except sqlite3.OperationalError as e:
+        if "locked" in str(e):
+            metricas_sqlite["bloqueios"] += 1
+        raise
+    finally:
+        metricas_sqlite["escritas"].append(time.perf_counter() - inicio)
+
+
+class _CursorMedido(sqlite3.Cursor):
+    def execute(self, sql, *args):
+        if sql.lstrip().upper().startswith(("INSERT", "UPDATE", "DELETE")):
+            return _medir_escrita(super().execute, sql, *args)
+        return super().execute(sql, *args)
+
+    def executemany(self, sql, *args):
+        if sql.lstrip().upper().startswith(("INSERT", "UPDATE", "DELETE")):
+            return _medir_escrita(super().executemany, sql, *args)
+        return super().executemany(sql, *args)
+
+
+class _ConexaoMedida(sqlite3.Connection):
+    def cursor(self, factory=_CursorMedido):
+        return super().cursor(factory)
+
+    def execute(self, sql, *args):
+        return self.cursor().execute(sql, *args)
+
+    def executemany(self, sql, *args):
+        return self.cursor().executemany(sql, *args)
+
+    def commit(self):
+        return _medir_escrita(super().commit)
+
+
+def instalar_sqlite_medido():
+    connect_original = sqlite3.connect
+
+    def connect_medido(*args, **kwargs):
+        kwargs.setdefault("factory", _ConexaoMedida)
+        return connect_original(*args, **kwargs)
+
+    sqlite3.connect = connect_medido
+
+
+# O AppTest troca estado global do Streamlit a cada execução (runtime, secrets),
+# então as sessões concorrentes rodam em processos separados, como réplicas reais
+# do app disputando o mesmo avaliacoes.db
+def _inicializar_processo(base_url, pasta):
+    instalar_rede_local(base_url)
+    instalar_sqlite_medido()
+    # O dashboard usa avaliacoes.db no diretório atual
+    os.chdir(pasta)
+
+
+# Sessão de um supervisor: Dashboard -> Nova Avaliação -> Histórico
+def _executar(at, etapa, resultados, timeout):
+    inicio = time.perf_counter()
+    try:
+        at.run(timeout=timeout)
+        if at.exception:
+            erro = at.exception[0].message
+        elif at.error:
+            erro = at.error[0].value
+        else:
+            erro = None
+    except RuntimeError as e:
+        erro = str(e)
+    resultados.append((etapa, time.perf_counter() - inicio, erro))
+    return erro is None
+
+
+def _percorrer_sessao(at, rnd, resultados, timeout):
+    if not _executar(at, "Dashboard", resultados, timeout):
+        return
+
+    at.sidebar.selectbox[0].set_value("Nova Avaliação")
+    if not _executar(at, "Nova Avaliação (abrir)", resultados, timeout):
+        return
+
+    avaliador, colaborador = at.selectbox[0], at.selectbox[1]
+    avaliador.set_value(rnd.choice(avaliador.options))
+    colaborador.set_value(rnd.choice(colaborador.options))
+    at.radio(key="classificacao").set_value(rnd.choice(at.radio(key="classificacao").options))
+    at.button[0].click()
+    if not _executar(at, "Nova Avaliação (enviar)", resultados, timeout):
+        return
+
+    at.sidebar.selectbox[0].set_value("Histórico de Avaliações")
+    if not _executar(at, "Histórico (abrir)", resultados, timeout):
+        return
+
+    for botao in at.button:
+        if botao.label == "📥 Baixar Histórico (Excel)":
+            botao.click()
+            _executar(at, "Histórico (exportar Excel)", resultados, timeout)
+            break
+
+
+def simular_sessao(numero, timeout):
+    resultados = []
+    metricas_sqlite["escritas"] = []
+    metricas_sqlite["bloqueios"] = 0
+
+    at = AppTest.from_file(DASHBOARD_PATH, default_timeout=timeout)
+    at.secrets["azure"] = {
+        "CLIENT_ID": "client-local",
+        "CLIENT_SECRET": "secret-local",
+        "TENANT_ID": "tenant-local",
+    }
+    at.secrets["paths"] = {"LOGO_PATH": LOGO_PATH}
+    # Cada supervisor trabalha na sua regional
+    at.session_state["regional"] = REGIONAIS[numero % len(REGIONAIS)]
+    _percorrer_sessao(at, random.Random(numero), resultados, timeout)
+
+    return resultados, metricas_sqlite["escritas"], metricas_sqlite["bloqueios"]
+
+
+def _percentis(valores):
+    p50, p90, p99 = np.percentile(valores, [50, 90, 99])
+    return p50 * 1000, p90 * 1000, p99 * 1000, max(valores) * 1000
+
+
+def imprimir_relatorio(sessoes, duracao_total):
+    resultados = [r for resultados, _, _ in sessoes for r in resultados]
+    escritas = [e for _, escritas, _ in sessoes for e in escritas]
+    bloqueios = sum(b for _, _, b in sessoes)
+
+    print()
+    print(f"Sessões: {len(sessoes)}  |  Tempo total: {duracao_total:.2f}s  |  "
+          f"Vazão: {len(resultados) / duracao_total:.2f} etapas/s, {len(sessoes) / duracao_total:.2f} sessões/s")
+    print()
+    print(f"{'Etapa':<28}{'n':>6}{'erros':>7}{'p50 ms':>10}{'p90 ms':>10}{'p99 ms':>10}{'máx ms':>10}")
+
+    por_etapa = defaultdict(list)
+    erros = defaultdict(list)
+    for etapa, duracao, erro in resultados:
+        por_etapa[etapa].append(duracao)
+        if erro:
+            erros[etapa].append(erro)
+
+    for etapa, duracoes in por_etapa.items():
+        p50, p90, p99, maximo = _percentis(duracoes)
+        print(f"{etapa:<28}{len(duracoes):>6}{len(erros.get(etapa, [])):>7}"
+              f"{p50:>10.1f}{p90:>10.1f}{p99:>10.1f}{maximo:>10.1f}")
+
+    print()
+    if escritas:
+        p50, p90, p99, maximo = _percentis(escritas)
+        print(f"SQLite: {len(escritas)} escritas/commits  |  "
+              f"p50 {p50:.1f} ms  p90 {p90:.1f} ms  p99 {p99:.1f} ms  máx {maximo:.1f} ms  |  "
+              f"'database is locked': {bloqueios}")
+    else:
+        print("SQLite: nenhuma escrita registrada")
+
+    print("Requisições ao Graph/MSAL local: " +
+          ", ".join(f"{host}={n}" for host, n in sorted(_GraphLocalHandler.contador.items())))
+
+    for etapa, mensagens in erros.items():
+        print(f"\nPrimeiro erro em '{etapa}': {mensagens[0]}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Teste de carga offline do Sistema de Avaliação")
+    parser.add_argument("--sessoes", type=int, default=20, help="total de sessões simuladas")
+    parser.add_argument("--concorrencia", type=int, default=8, help="sessões executando ao mesmo tempo")
+    parser.add_argument("--colaboradores", type=int, default=2000, help="linhas da planilha sintética")
+    parser.add_argument("--timeout", type=float, default=120, help="timeout de cada execução do script (s)")
+    args = parser.parse_args()
+
+    # O AppTest substitui o __main__ dos processos de trabalho pelo dashboard,
+    # então as funções enviadas a eles precisam vir do módulo importável
+    from loadtest import _inicializar_processo, simular_sessao
+
+    _GraphLocalHandler.planilha = gerar_planilha_colaboradores(args.colaboradores)
+    servidor = ThreadingHTTPServer(("127.0.0.1", 0), _GraphLocalHandler)
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{servidor.server_address[1]}"
+
+    # Banco isolado em uma pasta temporária, compartilhado por todos os processos
+    with tempfile.TemporaryDirectory() as pasta:
+        inicio = time.perf_counter()
+        with ProcessPoolExecutor(
+            max_workers=args.concorrencia,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_inicializar_processo,
+            initargs=(base_url, pasta),
+        ) as executor:
+            sessoes = list(executor.map(simular_sessao, range(args.sessoes), [args.timeout] * args.sessoes))
+        duracao_total = time.perf_counter() - inicio
+
+    servidor.shutdown()
+    imprimir_relatorio(sessoes, duracao_total)
+
+
+if __name__ == "__main__":
+    main()